@@ -1,19 +1,43 @@
-import os, time, math, re, requests, math
-
-from datetime import datetime, timezone
-from typing import Optional, Tuple, Dict, Any, List
+import os, math, re, asyncio, httpx, orjson, multiprocessing
+from contextlib import nullcontext
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlencode
+from functools import lru_cache
+from typing import Callable, Optional, Tuple, Dict, List
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 
 NASA_API = "https://api.nasa.gov/neo/rest/v1"
 NASA_KEY = os.getenv("NASA_API_KEY", "9cL9fpjqbydKR16ZMCJ1znPDTf9xN6uMOyvHcpFJ")
 ALLOWED_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
 CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+CACHE_MAX = int(os.getenv("CACHE_MAX", "4096"))  # máx. de respostas NeoWS no cache local
 DEFAULT_RHO_G_CM3 = float(os.getenv("DEFAULT_RHO_G_CM3", "2.5"))
 DEFAULT_ALBEDO    = float(os.getenv("DEFAULT_ALBEDO", "0.14"))
 SSOD_BASE = "https://ssp.imcce.fr/webservices/ssodnet/api"
 SBDB_BASE = "https://ssd-api.jpl.nasa.gov/sbdb.api"
+UPSTREAM_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", "10"))  # chamadas simultâneas à NeoWS
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "50"))  # conexões TLS mantidas abertas no pool
+FEED_MAX_DAYS = int(os.getenv("FEED_MAX_DAYS", "62"))  # /neo/feed divide em janelas de 7 dias até este limite
+# processos p/ build_assessment em lote, POR worker do uvicorn (total = WEB_CONCURRENCY × ASSESS_WORKERS):
+# divide as CPUs entre os workers e no máx. 2 (em contêiner cpu_count() enxerga as CPUs do host)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+ASSESS_WORKERS = int(os.getenv("ASSESS_WORKERS", str(min(2, max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))))
+ASSESS_OFFLOAD_MIN = int(os.getenv("ASSESS_OFFLOAD_MIN", "500"))  # lotes menores rodam no próprio loop
+ASSESS_CHUNK = 250  # NEOs por tarefa enviada ao pool
+STALE_TTL = int(os.getenv("STALE_TTL", "86400"))  # quanto tempo guardar a última resposta (revalidar / servir stale)
+STALE_MAX = int(os.getenv("STALE_MAX", "1024"))  # máx. de respostas guardadas p/ revalidar / servir stale
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))  # novas tentativas em 429/5xx/erro de conexão
+REDIS_URL = os.getenv("REDIS_URL")  # opcional: cache NeoWS compartilhado entre workers
 
 # Alvos básicos
 TARGET_RHO = {
@@ -25,8 +49,10 @@ TARGET_RHO = {
 }
 
 G_EARTH = 9.80665  # m/s^2
+_G_EARTH_PI_SCALING = G_EARTH ** -0.22  # termo g^-0.22 do pi-scaling (constante)
 JOULES_PER_KT_TNT = 4.184e12  # 1 kt TNT
 JOULES_PER_MT_TNT = 4.184e15  # 1 Mt TNT
+_FOUR_THIRDS_PI = 4.0 / 3.0 * math.pi  # volume da esfera = (4/3)·π·r³
 
 # --- ocean/tsunami defaults ---
 OCEAN_DEFAULT_DEPTH_M = 4000.0     # profundidade típica oceano aberto
@@ -43,9 +69,12 @@ def _parse_csv_floats(s: str | None) -> list[float]:
     if not s: return []
     out = []
     for tok in s.split(","):
+        t = tok.strip()
+        if not t:
+            continue
         try:
-            out.append(float(tok.strip()))
-        except Exception:
+            out.append(float(t))
+        except ValueError:
             pass
     return out
 
@@ -72,11 +101,14 @@ def _ocean_wavefield_from_crater(
 
     r0_m = nearfield_radius_factor * (Dtc_m / 2.0)
     A0_m = alpha_init * Dtc_m
+    # invariantes fora do loop (shoaling e escala de dispersão não dependem de R)
+    Ld = max(Ld_km, 1.0)
+    shoal = (water_depth_m / max(coast_depth_m, 1.0)) ** 0.25
+    exp = math.exp
     results = []
     for R_km in (distances_km or [50.0, 100.0, 200.0, 500.0]):
         R = max(R_km * 1000.0, r0_m)
-        A_deep = A0_m * (r0_m / R) * math.exp(- (R_km / max(Ld_km, 1.0)))
-        shoal = (water_depth_m / max(coast_depth_m, 1.0)) ** 0.25
+        A_deep = A0_m * (r0_m / R) * exp(- (R_km / Ld))
         A_coast = A_deep * shoal
         runup = runup_factor * A_coast
         results.append({
@@ -107,17 +139,29 @@ def _to_kg_m3_from_g_cm3(x):
     v = _num(x)
     return None if v is None else v * 1000.0
 
+def _quick_max_rel_vel(neo: dict) -> float:
+    """
+    Mesmo max_rel_vel_kms de compute_metrics (mesmas regras de descarte),
+    sem parsear datas nem montar o resto das métricas.
+    """
+    vels = []
+    for ap in neo.get("close_approach_data", []):
+        if not isinstance(ap, dict):
+            continue
+        try:
+            float(ap["miss_distance"]["kilometers"])
+            vels.append(float(ap["relative_velocity"]["kilometers_per_second"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return max(vels, default=0.0)
+
 def _resolve_velocity_kms(neo: dict, velocity_kms: float | None):
-    # usa o que veio da query; se não, tenta "metrics"; senão, 20 km/s (típico)
+    # usa o que veio da query; se não, a maior vel. relativa das aproximações; senão, 20 km/s (típico)
     if velocity_kms:
         return float(velocity_kms)
-    try:
-        m = compute_metrics(neo) or {}
-        v = m.get("max_rel_vel_kms") or m.get("min_rel_vel_kms")
-        if v:
-            return float(v)
-    except Exception:
-        pass
+    v = _quick_max_rel_vel(neo)
+    if v:
+        return v
     return 20.0  # típico de impactos na Terra (11–72 km/s). :contentReference[oaicite:3]{index=3}
 
 def _resolve_diameter_km(neo: dict, enr: dict | None, override_km: float | None):
@@ -139,13 +183,13 @@ def _resolve_density_kg_m3(enr: dict | None, override_g_cm3: float | None):
         return _to_kg_m3_from_g_cm3(enr["density_g_cm3"])
     return _to_kg_m3_from_g_cm3(DEFAULT_RHO_G_CM3)
 
-def _resolve_mass_kg(enr: dict | None, override_mass_kg: float | None, d_km: float | None, rho_g_cm3: float | None):
+def _resolve_mass_kg(enr: dict | None, override_mass_kg: float | None, d_km: float | None, rho_kg_m3: float | None):
     if override_mass_kg is not None:
         return float(override_mass_kg)
     if enr and enr.get("mass_kg") is not None:
         return float(enr["mass_kg"])
     # estima pela esfera
-    return estimate_mass_from_diameter_density(d_km, rho_g_cm3)
+    return _mass_from_diameter_kg_m3(d_km, rho_kg_m3)
 
 def _crater_transient_diameter_m(L_m, v_ms, rho_i, rho_t, theta_deg):
     """
@@ -158,7 +202,7 @@ def _crater_transient_diameter_m(L_m, v_ms, rho_i, rho_t, theta_deg):
     try:
         mu = (rho_i / rho_t) ** (1.0 / 3.0)
         sin_term = math.sin(math.radians(theta_deg)) ** (1.0 / 3.0)
-        return 1.161 * mu * (L_m ** 0.78) * (v_ms ** 0.44) * (G_EARTH ** -0.22) * sin_term
+        return 1.161 * mu * (L_m ** 0.78) * (v_ms ** 0.44) * _G_EARTH_PI_SCALING * sin_term
     except Exception:
         return None
 
@@ -223,7 +267,8 @@ def estimate_impact_effects(neo: dict,
     v_kms = _resolve_velocity_kms(neo, velocity_kms); v_ms = v_kms * 1000.0
     d_km = _resolve_diameter_km(neo, enr, override_diameter_km)
     rho_g_cm3 = override_density_g_cm3 if override_density_g_cm3 is not None else (enr or {}).get("density_g_cm3", DEFAULT_RHO_G_CM3)
-    m_kg = _resolve_mass_kg(enr, override_mass_kg, d_km, rho_g_cm3)
+    rho_kg_m3 = _to_kg_m3_from_g_cm3(rho_g_cm3)  # converte uma vez; massa e cratera usam SI
+    m_kg = _resolve_mass_kg(enr, override_mass_kg, d_km, rho_kg_m3)
 
     # energia/momento
     E_j = 0.5 * float(m_kg) * (v_ms ** 2) if (m_kg is not None) else None
@@ -231,10 +276,13 @@ def estimate_impact_effects(neo: dict,
     tnt_Mt = (E_j / JOULES_PER_MT_TNT) if E_j is not None else None
     p_Ns = (float(m_kg) * v_ms) if m_kg is not None else None
 
+    # alvo normalizado uma vez (cratera e oceano usam a mesma chave)
+    tgt_lower = (target or "rock").lower()
+
     # PI-scaling já existente:
     L_m = d_km * 1000.0 if d_km is not None else None
-    Dtc_m = _crater_transient_diameter_m(L_m, v_ms, _to_kg_m3_from_g_cm3(rho_g_cm3) or 2500.0,
-                                         TARGET_RHO.get((target or "rock").lower(), 2700.0),
+    Dtc_m = _crater_transient_diameter_m(L_m, v_ms, rho_kg_m3 or 2500.0,
+                                         TARGET_RHO.get(tgt_lower, 2700.0),
                                          angle_deg)
     Dfr_km = _crater_final_from_transient_km(Dtc_m)
     depth_km = _crater_depth_km(Dfr_km)
@@ -242,7 +290,6 @@ def estimate_impact_effects(neo: dict,
 
     # --- NOVO: oceano/tsunami, só se alvo 'water' (ou se usuário informar profundidade) ---
     ocean = None
-    tgt_lower = (target or "rock").lower()
     if tgt_lower in ("water", "ice") or (water_depth_m is not None):
         wdep = float(water_depth_m or OCEAN_DEFAULT_DEPTH_M)
         rlist = _parse_csv_floats(coast_r_km_csv) or [50.0, 100.0, 200.0, 500.0]
@@ -353,74 +400,204 @@ def estimate_impact_effects(neo: dict,
 #     }
 
 
-_cache: Dict[Any, Tuple[float, Any]] = {}
+# LRU + TTL limitado: entradas expiram sozinhas e o tamanho não cresce sem limite
+_cache = TTLCache(maxsize=CACHE_MAX, ttl=CACHE_TTL)
 
-def _cache_get(key):
-    item = _cache.get(key)
-    if not item: return None
-    exp, data = item
-    if time.time() > exp:
-        _cache.pop(key, None)
-        return None
-    return data
+# limita o fan-out contra a NeoWS (evita 429 no rate limit da api_key)
+_upstream_sem = asyncio.Semaphore(UPSTREAM_CONCURRENCY)
 
-def _cache_set(key, data, ttl=CACHE_TTL):
-    _cache[key] = (time.time() + ttl, data)
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
 
-def _get(url, params):
-    cache_key = (url, tuple(sorted(params.items())))
-    cached = _cache_get(cache_key)
+# (headers condicionais ou None, corpo bruto) da última resposta 200 da NeoWS;
+# sobrevive ao CACHE_TTL p/ revalidação e p/ servir stale em 429/5xx
+_stale_cache = TTLCache(maxsize=STALE_MAX, ttl=STALE_TTL)
+
+# stale servido por falha da NeoWS: segura só alguns segundos no L1 (poupa a
+# NeoWS durante a queda) e nunca vai p/ o Redis nem para o _cache "fresco"
+_DEGRADED_TTL = 30
+_degraded_cache = TTLCache(maxsize=256, ttl=_DEGRADED_TTL)
+
+# requisições em andamento por chave (single-flight): misses concorrentes
+# iguais esperam a mesma chamada em vez de multiplicar o tráfego à NASA
+_inflight: Dict[tuple, asyncio.Task] = {}
+
+async def _get(url, params):
+    return (await _get_state(url, params))[0]
+
+async def _get_state(url, params) -> Tuple[dict, bool]:
+    """Como _get, mas devolve (dados, degradado?): True = stale servido por falha da NeoWS."""
+    cache_key = (url, frozenset(params.items()))  # sem sort; valores são str/int
+    cached = _cache.get(cache_key)
     if cached is not None:
-        return cached
-    r = requests.get(url, params=params, timeout=30)
-    if r.status_code != 200:
-        raise HTTPException(status_code=r.status_code, detail=r.text)
-    data = r.json()
-    _cache_set(cache_key, data)
-    return data
+        return cached, False
+    cached = _degraded_cache.get(cache_key)
+    if cached is not None:
+        return cached, True
+    task = _inflight.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(url, params, cache_key))
+        _inflight[cache_key] = task
+        task.add_done_callback(lambda _: _inflight.pop(cache_key, None))
+    # shield: cliente que desconecta não cancela a busca dos demais
+    return await asyncio.shield(task)
+
+async def _http_get(url, params=None, headers=None, sem=None) -> httpx.Response:
+    """GET no cliente compartilhado; repete (backoff) em 429/5xx e falhas de conexão."""
+    for attempt in range(UPSTREAM_RETRIES + 1):
+        last = attempt == UPSTREAM_RETRIES
+        try:
+            async with (sem or nullcontext()):
+                r = await app.state.http.get(url, params=params, headers=headers)
+        except httpx.TransportError:
+            if last:
+                raise
+        else:
+            if r.status_code not in _RETRY_STATUS or last:
+                return r
+        await asyncio.sleep(0.3 * (2 ** attempt))  # backoff fora do semáforo
 
-def _parse_iso(dt: str) -> datetime:
+async def _redis_get(key: str) -> Optional[bytes]:
+    # L2 opcional: sem REDIS_URL ou com o Redis fora do ar, é só um miss
+    if app.state.redis is None:
+        return None
+    try:
+        return await app.state.redis.get(key)
+    except Exception:
+        return None
+
+async def _redis_set(key: str, ttl: int, raw: bytes):
+    if app.state.redis is None:
+        return
     try:
-        return datetime.fromisoformat(dt.replace("Z", "+00:00"))
+        await app.state.redis.setex(key, ttl, raw)
     except Exception:
+        pass
+
+async def _fetch(url, params, cache_key):
+    # L2 (Redis) compartilhado entre workers; _cache local continua como L1.
+    # api_key fica fora da chave (não vaza p/ o Redis; resposta não depende dela)
+    redis_key = "neows:" + url + "?" + urlencode(sorted(kv for kv in params.items() if kv[0] != "api_key"))
+    raw = await _redis_get(redis_key)
+    if raw:
+        data = orjson.loads(raw)
+        _cache[cache_key] = data
+        return data, False
+    # resposta expirada com validador: revalida (304 = só headers, sem baixar o JSON)
+    stale = _stale_cache.get(cache_key)
+    headers = stale[0] if stale else None
+    try:
+        r = await _http_get(url, params=params, headers=headers, sem=_upstream_sem)
+    except httpx.TransportError:
+        if not stale:
+            raise
+        r = None
+    if r is None or (r.status_code in _RETRY_STATUS and stale):
+        # NeoWS fora do ar/limitada (já após os retries): serve a última versão boa
+        data = orjson.loads(stale[1])
+        _degraded_cache[cache_key] = data
+        return data, True
+    if r.status_code == 304 and stale:
+        content = stale[1]
+    elif r.status_code != 200:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    else:
+        content = r.content
+        validators = {}
+        if "ETag" in r.headers:
+            validators["If-None-Match"] = r.headers["ETag"]
+        if "Last-Modified" in r.headers:
+            validators["If-Modified-Since"] = r.headers["Last-Modified"]
+        _stale_cache[cache_key] = (validators or None, content)
+    data = orjson.loads(content)
+    _cache[cache_key] = data
+    await _redis_set(redis_key, CACHE_TTL, content)
+    return data, False
+
+@lru_cache(maxsize=8192)
+def _parse_iso_cached(dt: str) -> Optional[datetime]:
+    # caminho rápido p/ "YYYY-MM-DD" (close_approach_date), sem exceções
+    if len(dt) == 10 and dt[4] == "-" and dt[7] == "-" and dt.isascii() \
+            and dt[:4].isdigit() and dt[5:7].isdigit() and dt[8:].isdigit():
+        try:
+            return datetime(int(dt[:4]), int(dt[5:7]), int(dt[8:]))
+        except ValueError:
+            return None
+    # mês por extenso ("2025-Jan-01 12:00") não casa com nenhum formato abaixo
+    if dt[5:8].isalpha():
+        return None
+    try:
+        # só troca o sufixo "Z" quando ele existe (evita copiar a string à toa)
+        return datetime.fromisoformat(dt[:-1] + "+00:00" if dt.endswith("Z") else dt)
+    except ValueError:
         for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
             try:
                 return datetime.strptime(dt, fmt).replace(tzinfo=timezone.utc)
-            except Exception:
+            except ValueError:
                 pass
-    return datetime.now(timezone.utc)
+    return None
 
-def compute_metrics(neo: dict) -> dict:
+def _parse_iso(dt: str) -> datetime:
+    # o fallback "agora" fica fora do cache (não pode congelar o relógio)
+    parsed = _parse_iso_cached(dt)
+    return parsed if parsed is not None else datetime.now(timezone.utc)
+
+def _dia_km(neo: dict) -> Optional[float]:
+    # único ponto de acesso ao diâmetro máx. (km); None se o NEO não traz
     try:
-        diameter_km = neo["estimated_diameter"]["kilometers"]["estimated_diameter_max"]
-    except Exception:
-        diameter_km = None
+        return neo["estimated_diameter"]["kilometers"]["estimated_diameter_max"]
+    except (KeyError, TypeError):
+        return None
+
+@dataclass(slots=True, frozen=True)
+class NeoMetrics:
+    # mesma ordem de campos do antigo dict: o JSON do assessment não muda
+    diameter_km: Optional[float]
+    is_hazardous: bool
+    min_miss_km: Optional[float]
+    days_to_soonest_approach: Optional[int]
+    soonest_approach_utc: Optional[datetime]  # orjson serializa datetime (ISO 8601)
+    max_rel_vel_kms: float
+    absolute_magnitude_h: Optional[float]
+
+def _scan_approaches(neo: dict) -> Tuple[NeoMetrics, List[tuple], tuple]:
+    """
+    Uma passada só sobre close_approach_data. Devolve (métricas, linhas, limites),
+    onde linhas = [(data, orbiting_body em minúsculas)] alimentam o filtro de
+    janela/corpo sem reparsear as datas e limites = (menor data, maior data,
+    há linha sem data?, corpos) permitem decidir o filtro sem varrer as linhas.
+    """
+    diameter_km = _dia_km(neo)
 
     is_hazardous = bool(neo.get("is_potentially_hazardous_asteroid", False))
     H = neo.get("absolute_magnitude_h", None)
 
-    min_miss = float("inf")
-    soonest_dt = None
-    max_rel_vel_kms = 0.0
-
+    # extrai as colunas; as reduções ficam com min/max (em C)
+    misses: List[float] = []
+    vels: List[float] = []
+    dates: List[datetime] = []
+    rows: List[tuple] = []
     for ap in neo.get("close_approach_data", []):
+        if not isinstance(ap, dict):
+            continue
+        dt_str = ap.get("close_approach_date_full") or ap.get("close_approach_date")
+        dt = _parse_iso(dt_str) if isinstance(dt_str, str) and dt_str else None
+        rows.append((dt.date() if dt else None, str(ap.get("orbiting_body", "")).lower()))
+        if dt and dt.tzinfo is None:
+            # "YYYY-MM-DD" sai naive; o fallback now() é aware: tudo em UTC p/ min()/delta
+            dt = dt.replace(tzinfo=timezone.utc)
         try:
             md_km = float(ap["miss_distance"]["kilometers"])
             rv_kms = float(ap["relative_velocity"]["kilometers_per_second"])
-            dt_str = ap.get("close_approach_date_full") or ap.get("close_approach_date")
-            dt = _parse_iso(dt_str) if dt_str else None
-
-            if md_km < min_miss:
-                min_miss = md_km
-            if rv_kms > max_rel_vel_kms:
-                max_rel_vel_kms = rv_kms
-            if dt and (soonest_dt is None or dt < soonest_dt):
-                soonest_dt = dt
-        except Exception:
+        except (KeyError, TypeError, ValueError):
             continue
+        misses.append(md_km)
+        vels.append(rv_kms)
+        if dt:
+            dates.append(dt)
 
-    if min_miss == float("inf"):
-        min_miss = None
+    min_miss = min(misses) if misses else None
+    max_rel_vel_kms = max(vels, default=0.0)
+    soonest_dt = min(dates) if dates else None
 
     now = datetime.now(timezone.utc)
     days_to_soonest = None
@@ -428,209 +605,345 @@ def compute_metrics(neo: dict) -> dict:
         delta = soonest_dt - now
         days_to_soonest = int(delta.total_seconds() // 86400)
 
-    return {
-        "diameter_km": diameter_km,
-        "is_hazardous": is_hazardous,
-        "min_miss_km": min_miss,
-        "days_to_soonest_approach": days_to_soonest,
-        "soonest_approach_utc": soonest_dt.isoformat() if soonest_dt else None,
-        "max_rel_vel_kms": max_rel_vel_kms,
-        "absolute_magnitude_h": H,
-    }
+    metrics = NeoMetrics(diameter_km, is_hazardous, min_miss, days_to_soonest,
+                         soonest_dt, max_rel_vel_kms, H)
+    row_dates = [d for d, _ in rows if d]
+    bounds = (min(row_dates, default=None), max(row_dates, default=None),
+              len(row_dates) < len(rows), frozenset(b for _, b in rows))
+    return metrics, rows, bounds
 
-def classify_threat(m: dict) -> str:
-    dia = m.get("diameter_km") or 0.0
-    miss = m.get("min_miss_km")
-    days = m.get("days_to_soonest_approach")
+def compute_metrics(neo: dict) -> NeoMetrics:
+    return _scan_approaches(neo)[0]
 
+# varredura por objeto NEO (chave id(neo); guarda o próprio dict para o id não ser reaproveitado)
+_metrics_cache = TTLCache(maxsize=8192, ttl=CACHE_TTL)
+
+def _scan_approaches_cached(neo: dict) -> Tuple[NeoMetrics, List[tuple], tuple]:
+    hit = _metrics_cache.get(id(neo))
+    if hit is not None and hit[0] is neo:
+        return hit[1:]
+    scan = _scan_approaches(neo)
+    _metrics_cache[id(neo)] = (neo,) + scan
+    return scan
+
+def compute_metrics_cached(neo: dict) -> NeoMetrics:
+    """
+    compute_metrics memoizado por objeto: filtros e build_assessment sobre o
+    mesmo NEO (inclusive vindo do _cache em outra requisição) reusam o resultado.
+    """
+    return _scan_approaches_cached(neo)[0]
+
+def classify_threat(m: NeoMetrics) -> str:
+    return _classify_core(m.diameter_km or 0.0, m.min_miss_km, m.days_to_soonest_approach)
+
+# rótulo por nível em meias-unidades (lvl*2 vai de 2 a 10)
+_LEVEL_BY_HALF = ("LOW",) * 4 + ("MODERATE",) * 2 + ("HIGH",) * 2 + ("CRITICAL",) * 3
+
+def _classify_core(dia: float, miss: Optional[float], days: Optional[int]) -> str:
     near = (miss is not None and miss < 1_000_000)
     mid_near = (miss is not None and miss < 5_000_000)
     soon = (days is not None and days <= 30)
     mid_term = (days is not None and 30 < days <= 365)
 
-    if dia >= 0.3: base = 3
-    elif dia >= 0.05: base = 2
-    else: base = 1
+    # soma de predicados (bool = 0/1) em vez da cascata de if/elif:
+    # base 1/2/3, +1 perto (+0.5 médio), +1 em breve (+0.5 no ano)
+    lvl2 = 2 + 2 * (dia >= 0.05) + 2 * (dia >= 0.3) + near + mid_near + 2 * soon + mid_term
+    return _LEVEL_BY_HALF[lvl2]
+
+# Sugestões são constantes de módulo: só leitura, compartilhadas entre NEOs (evita
+# recriar os mesmos dicts/listas a cada avaliação). Não mutar.
+_SUGGESTION_MONITOR = {
+    "title": "Monitoramento reforçado e refinamento orbital",
+    "when": "imediato e contínuo",
+    "rationale": "Melhora a precisão da órbita e reduz incertezas antes de qualquer decisão.",
+    "actions": [
+        "Follow-up com observatórios (óptico/radar).",
+        "Atualizar efemérides e propagar com perturbações."
+    ],
+    "suitable_for": ["LOW", "MODERATE", "HIGH", "CRITICAL"]
+}
 
-    lvl = base
-    if near: lvl += 1
-    elif mid_near: lvl += 0.5
-    if soon: lvl += 1
-    elif mid_term: lvl += 0.5
+_SUGGESTION_IAWN = {
+    "title": "Coordenação internacional (IAWN/NEO coordination)",
+    "when": "curto prazo",
+    "rationale": "Padroniza avaliação de risco e acesso a ativos de observação/defesa planetária.",
+    "actions": [
+        "Compartilhar elementos orbitais atualizados e janelas de visibilidade.",
+        "Planejar campanhas observacionais multi-longitude."
+    ],
+    "suitable_for": ["MODERATE", "HIGH", "CRITICAL"]
+}
 
-    if lvl >= 4: return "CRITICAL"
-    if lvl >= 3: return "HIGH"
-    if lvl >= 2: return "MODERATE"
-    return "LOW"
+_SUGGESTION_CIVIL_PROTECTION = {
+    "title": "Proteção civil e preparação de emergência",
+    "when": "curtíssimo prazo",
+    "rationale": "Mitigar danos caso ocorra entrada atmosférica inesperada.",
+    "actions": [
+        "Planos de evacuação/comunicação pública.",
+        "Inventário de abrigos e protocolos para infraestrutura crítica."
+    ],
+    "suitable_for": ["HIGH", "CRITICAL"]
+}
 
-def mitigation_suggestions(m: dict, level: str) -> List[dict]:
-    dia = m.get("diameter_km") or 0.0
-    days = m.get("days_to_soonest_approach")
-    miss = m.get("min_miss_km")
-    vel = m.get("max_rel_vel_kms") or 0.0
+_SUGGESTION_KINETIC = {
+    "title": "Deflexão cinética (Kinetic Impactor)",
+    "when": "médio/longo prazo",
+    "rationale": "Pequena mudança de velocidade ao longo de anos pode evitar impacto.",
+    "actions": [
+        "Janela de lançamento e Δv.",
+        "Análises de coesão/rotação do alvo."
+    ],
+    "suitable_for": ["MODERATE", "HIGH"]
+}
 
-    short_window = (days is not None and days <= 30)
-    year_window = (days is not None and days > 365)
+_SUGGESTION_GRAVITY_TRACTOR = {
+    "title": "Trator gravitacional",
+    "when": "longo prazo",
+    "rationale": "Empuxo gravitacional contínuo, útil quando há muitos anos de antecedência.",
+    "actions": [
+        "Estimar massa/forma do NEO; simular permanência orbital.",
+        "Avaliar consumo de propelente e ressonâncias."
+    ],
+    "suitable_for": ["MODERATE", "HIGH"]
+}
+
+_SUGGESTION_NUCLEAR = {
+    "title": "Explosão nuclear standoff (último recurso)",
+    "when": "curto prazo",
+    "rationale": "Opção extrema quando o tempo é insuficiente.",
+    "actions": [
+        "Análise legal e coordenação internacional.",
+        "Estudo de fragmentação e risco colateral."
+    ],
+    "suitable_for": ["HIGH", "CRITICAL"]
+}
 
+def mitigation_suggestions(m: NeoMetrics, level: str) -> List[dict]:
+    dia = m.diameter_km or 0.0
+    days = m.days_to_soonest_approach
+    miss = m.min_miss_km
+
+    # a lista só depende destes predicados -> memo exato (sem arredondar métricas)
+    return _suggestions_for(
+        level,
+        days is not None and days <= 30,
+        days is not None and days > 365,
+        days is not None and days <= 365,
+        miss is not None and miss < 1_000_000,
+        dia >= 0.05, dia >= 0.1, dia >= 0.15,
+    )
+
+@lru_cache(maxsize=256)
+def _suggestions_for(level: str, short_window: bool, year_window: bool, within_year: bool,
+                     near: bool, dia_ge_005: bool, dia_ge_01: bool, dia_ge_015: bool) -> List[dict]:
+    # lista compartilhada entre NEOs com os mesmos predicados: não mutar
     suggestions: List[dict] = []
 
-    suggestions.append({
-        "title": "Monitoramento reforçado e refinamento orbital",
-        "when": "imediato e contínuo",
-        "rationale": "Melhora a precisão da órbita e reduz incertezas antes de qualquer decisão.",
-        "actions": [
-            "Follow-up com observatórios (óptico/radar).",
-            "Atualizar efemérides e propagar com perturbações."
-        ],
-        "suitable_for": ["LOW", "MODERATE", "HIGH", "CRITICAL"]
-    })
+    suggestions.append(_SUGGESTION_MONITOR)
 
     if level in ["MODERATE", "HIGH", "CRITICAL"]:
-        suggestions.append({
-            "title": "Coordenação internacional (IAWN/NEO coordination)",
-            "when": "curto prazo",
-            "rationale": "Padroniza avaliação de risco e acesso a ativos de observação/defesa planetária.",
-            "actions": [
-                "Compartilhar elementos orbitais atualizados e janelas de visibilidade.",
-                "Planejar campanhas observacionais multi-longitude."
-            ],
-            "suitable_for": ["MODERATE", "HIGH", "CRITICAL"]
-        })
+        suggestions.append(_SUGGESTION_IAWN)
 
-    if short_window or (miss is not None and miss < 1_000_000):
-        suggestions.append({
-            "title": "Proteção civil e preparação de emergência",
-            "when": "curtíssimo prazo",
-            "rationale": "Mitigar danos caso ocorra entrada atmosférica inesperada.",
-            "actions": [
-                "Planos de evacuação/comunicação pública.",
-                "Inventário de abrigos e protocolos para infraestrutura crítica."
-            ],
-            "suitable_for": ["HIGH", "CRITICAL"]
-        })
+    if short_window or near:
+        suggestions.append(_SUGGESTION_CIVIL_PROTECTION)
 
-    if dia >= 0.05 and not short_window:
-        suggestions.append({
-            "title": "Deflexão cinética (Kinetic Impactor)",
-            "when": "médio/longo prazo",
-            "rationale": "Pequena mudança de velocidade ao longo de anos pode evitar impacto.",
-            "actions": [
-                "Janela de lançamento e Δv.",
-                "Análises de coesão/rotação do alvo."
-            ],
-            "suitable_for": ["MODERATE", "HIGH"]
-        })
+    if dia_ge_005 and not short_window:
+        suggestions.append(_SUGGESTION_KINETIC)
 
-    if dia >= 0.1 and year_window:
-        suggestions.append({
-            "title": "Trator gravitacional",
-            "when": "longo prazo",
-            "rationale": "Empuxo gravitacional contínuo, útil quando há muitos anos de antecedência.",
-            "actions": [
-                "Estimar massa/forma do NEO; simular permanência orbital.",
-                "Avaliar consumo de propelente e ressonâncias."
-            ],
-            "suitable_for": ["MODERATE", "HIGH"]
-        })
+    if dia_ge_01 and year_window:
+        suggestions.append(_SUGGESTION_GRAVITY_TRACTOR)
 
-    if (level in ["HIGH", "CRITICAL"]) and (days is not None and days <= 365) and dia >= 0.15:
-        suggestions.append({
-            "title": "Explosão nuclear standoff (último recurso)",
-            "when": "curto prazo",
-            "rationale": "Opção extrema quando o tempo é insuficiente.",
-            "actions": [
-                "Análise legal e coordenação internacional.",
-                "Estudo de fragmentação e risco colateral."
-            ],
-            "suitable_for": ["HIGH", "CRITICAL"]
-        })
+    if (level in ["HIGH", "CRITICAL"]) and within_year and dia_ge_015:
+        suggestions.append(_SUGGESTION_NUCLEAR)
 
     return suggestions
 
-def build_assessment(neo: dict) -> dict:
-    metrics = compute_metrics(neo)
+@dataclass(slots=True)
+class Assessment:
+    # layout fixo (sem dict por instância); orjson serializa dataclasses nativamente
+    metrics: NeoMetrics
+    threat_level: str
+    mitigations: List[dict]
+    disclaimer: str = "Avaliação heurística educacional; não substitui avaliações oficiais."
+
+# a avaliação é função pura das métricas: memo pela identidade do NeoMetrics
+# (guarda o próprio objeto; expira junto com o _metrics_cache, então days_* não envelhece)
+_assess_cache = TTLCache(maxsize=8192, ttl=CACHE_TTL)
+
+def build_assessment(neo: dict) -> Assessment:
+    metrics = compute_metrics_cached(neo)
+    hit = _assess_cache.get(id(metrics))
+    if hit is not None and hit[0] is metrics:
+        return hit[1]
+    assessment = _new_assessment(metrics)
+    _assess_cache[id(metrics)] = (metrics, assessment)
+    return assessment
+
+def _new_assessment(metrics: NeoMetrics) -> Assessment:
     level = classify_threat(metrics)
-    mitigations = mitigation_suggestions(metrics, level)
+    return Assessment(metrics, level, mitigation_suggestions(metrics, level))
+
+def _cached_assessment(neo: dict) -> Optional[Assessment]:
+    """Só consulta os memos (não calcula nada); None se ainda não avaliado."""
+    scan = _metrics_cache.get(id(neo))
+    if scan is None or scan[0] is not neo:
+        return None
+    hit = _assess_cache.get(id(scan[1]))
+    return hit[1] if hit is not None and hit[0] is scan[1] else None
+
+def _assessment_input(neo: dict) -> dict:
+    """Só os campos que build_assessment lê (reduz o custo de pickle p/ o pool)."""
+    kms = ((neo.get("estimated_diameter") or {}).get("kilometers") or {})
     return {
-        "metrics": metrics,
-        "threat_level": level,
-        "mitigations": mitigations,
-        "disclaimer": "Avaliação heurística educacional; não substitui avaliações oficiais."
+        "estimated_diameter": {"kilometers": {"estimated_diameter_max": kms.get("estimated_diameter_max")}},
+        "is_potentially_hazardous_asteroid": neo.get("is_potentially_hazardous_asteroid", False),
+        "absolute_magnitude_h": neo.get("absolute_magnitude_h"),
+        "close_approach_data": [
+            {
+                "close_approach_date_full": ap.get("close_approach_date_full"),
+                "close_approach_date": ap.get("close_approach_date"),
+                "orbiting_body": ap.get("orbiting_body", ""),
+                "miss_distance": {"kilometers": (ap.get("miss_distance") or {}).get("kilometers")},
+                "relative_velocity": {"kilometers_per_second": (ap.get("relative_velocity") or {}).get("kilometers_per_second")},
+            }
+            for ap in neo.get("close_approach_data", []) if isinstance(ap, dict)
+        ],
     }
 
+def _assess_batch(neos: List[dict]) -> List[tuple]:
+    # roda no pool: devolve (métricas, linhas, limites, avaliação) p/ o pai gravar
+    # nos próprios memos (os caches deste processo não servem a ninguém)
+    out = []
+    for neo in neos:
+        scan = _scan_approaches(neo)
+        out.append(scan + (_new_assessment(scan[0]),))
+    return out
+
+async def assess_many(neos: List[dict]):
+    """
+    Grava neo["assessment"] em cada NEO. Lotes grandes (>= ASSESS_OFFLOAD_MIN)
+    vão para o pool de processos, em blocos, para não travar o event loop; o que
+    volta do pool entra em _metrics_cache/_assess_cache como no caminho local.
+    """
+    pool = getattr(app.state, "assess_pool", None)
+    if pool is None or len(neos) < ASSESS_OFFLOAD_MIN:
+        for neo in neos:
+            neo["assessment"] = build_assessment(neo)
+        return
+    # NEOs já avaliados (mesmo dict vindo do _cache) não vão para o pool
+    todo = []
+    for neo in neos:
+        hit = _cached_assessment(neo)
+        if hit is None:
+            todo.append(neo)
+        else:
+            neo["assessment"] = hit
+    if len(todo) < ASSESS_OFFLOAD_MIN:
+        for neo in todo:
+            neo["assessment"] = build_assessment(neo)
+        return
+    neos = todo
+    loop = asyncio.get_running_loop()
+    slim = [_assessment_input(neo) for neo in neos]
+    chunks = await asyncio.gather(*[
+        loop.run_in_executor(pool, _assess_batch, slim[i:i + ASSESS_CHUNK])
+        for i in range(0, len(slim), ASSESS_CHUNK)
+    ])
+    results = [res for chunk in chunks for res in chunk]
+    # grava nos memos do pai: a próxima requisição com os mesmos dicts não recalcula
+    for neo, (metrics, rows, bounds, assessment) in zip(neos, results):
+        _metrics_cache[id(neo)] = (neo, metrics, rows, bounds)
+        _assess_cache[id(metrics)] = (metrics, assessment)
+        neo["assessment"] = assessment
+
 # -------- Enrichment (mass/density) --------
 ENRICH_TTL = int(os.getenv("ENRICH_TTL", "30"))  # 6h
-_enrich_cache: Dict[str, Tuple[float, Any]] = {}
-
-def _enrich_cache_get(key):
-    item = _enrich_cache.get(key)
-    if not item: return None
-    exp, data = item
-    if time.time() > exp:
-        _enrich_cache.pop(key, None)
-        return None
-    return data
+ENRICH_MAX = int(os.getenv("ENRICH_MAX", "16384"))  # máx. de labels no cache de enrichment
+_enrich_cache = TTLCache(maxsize=ENRICH_MAX, ttl=ENRICH_TTL)
+
+# cache negativo: "não existe" (404 / resposta vazia) no SsODNet/SBDB; erros de rede e 5xx não entram
+NEG_CACHE_TTL = int(os.getenv("NEG_CACHE_TTL", "600"))
+_neg_cache = TTLCache(maxsize=8192, ttl=NEG_CACHE_TTL)
+_MISS = object()  # sentinela: None/{} são valores válidos no cache negativo
 
-def _enrich_cache_set(key, data, ttl=ENRICH_TTL):
-    _enrich_cache[key] = (time.time() + ttl, data)
+# limita o fan-out por host (enrich de um lote grande não esgota o pool HTTP)
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "8"))  # chamadas simultâneas por host
+_ssod_sem = asyncio.Semaphore(ENRICH_CONCURRENCY)
+_sbdb_sem = asyncio.Semaphore(ENRICH_CONCURRENCY)
+
+_NUM_RE = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
 
 def _num(x):
     """
     Extrai o primeiro float de x (dict {"value":...} ou string p/ "2.9 ± 0.5 g/cm^3").
     """
-    try:
-        if isinstance(x, dict):
-            x = x.get("value")
-        if x is None:
-            return None
-        if isinstance(x, (int, float)):
-            return float(x)
-        s = str(x)
-        m = re.search(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", s)
-        return float(m.group(0)) if m else None
-    except Exception:
+    if isinstance(x, dict):
+        x = x.get("value")
+    if x is None:
         return None
-
-def ssod_quaero(query: str):
-    try:
-        r = requests.get(f"{SSOD_BASE}/quaero/", params={"q": query}, timeout=30)
-        if r.status_code != 200:
+    if isinstance(x, (int, float)):
+        try:
+            return float(x)
+        except OverflowError:  # int gigante
             return None
-        js = r.json()
-        if isinstance(js, list) and js:
-            return js[0].get("id") or js[0].get("spkid") or js[0].get("name")
-        return None
-    except Exception:
-        return None
+    # o regex só casa literais numéricos válidos: float() não falha aqui
+    m = _NUM_RE.search(str(x))
+    return float(m.group(0)) if m else None
 
-def ssod_card(ssod_id: str):
-    try:
-        r = requests.get(f"{SSOD_BASE}/ssocard/{ssod_id}", timeout=30)
-        if r.status_code != 200:
-            return None
-        js = r.json()
-        # Se vier LISTA, pegue o primeiro dict "útil"
-        if isinstance(js, list):
-            for cand in js:
-                if isinstance(cand, dict):
-                    return cand
-            return None
-        # Se vier DICT, ok
-        if isinstance(js, dict):
-            return js
-        return None
-    except Exception:
-        return None
+class _LookupFailed(Exception):
+    """SsODNet/SBDB fora do ar (rede, 429/5xx, corpo inválido): nada disso vai p/ cache."""
 
-def sbdb_phys(sstr: str):
+async def _lookup_get(url: str, params: dict = None, sem: asyncio.Semaphore = None):
+    # JSON do 200; None em respostas definitivas sem dados (404, 300 "vários registros"
+    # do SBDB, 400...). Só rede, corpo inválido, 429 e 5xx são falhas transitórias
     try:
-        r = requests.get(SBDB_BASE, params={"sstr": sstr, "phys-par": "1"}, timeout=30)
-        if r.status_code != 200:
-            return None
-        js = r.json()
-        return js.get("phys_par", {}) if isinstance(js, dict) else None
-    except Exception:
-        return None
+        r = await _http_get(url, params=params, sem=sem)
+        if r.status_code == 200:
+            return orjson.loads(r.content)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+        raise _LookupFailed(f"{url}: {e!r}") from e
+    if r.status_code == 429 or r.status_code >= 500:
+        raise _LookupFailed(f"{url}: HTTP {r.status_code}")
+    return None
+
+async def ssod_quaero(query: str):
+    nk = ("quaero", query)
+    hit = _neg_cache.get(nk, _MISS)
+    if hit is not _MISS:
+        return hit
+    js = await _lookup_get(f"{SSOD_BASE}/quaero/", params={"q": query}, sem=_ssod_sem)
+    if isinstance(js, list) and js and isinstance(js[0], dict):
+        return js[0].get("id") or js[0].get("spkid") or js[0].get("name")
+    _neg_cache[nk] = None
+    return None
+
+async def ssod_card(ssod_id: str):
+    nk = ("ssocard", ssod_id)
+    hit = _neg_cache.get(nk, _MISS)
+    if hit is not _MISS:
+        return hit
+    js = await _lookup_get(f"{SSOD_BASE}/ssocard/{ssod_id}", sem=_ssod_sem)
+    # Se vier LISTA, pegue o primeiro dict "útil"
+    if isinstance(js, list):
+        for cand in js:
+            if isinstance(cand, dict):
+                return cand
+    # Se vier DICT, ok
+    elif isinstance(js, dict):
+        return js
+    _neg_cache[nk] = None
+    return None
+
+async def sbdb_phys(sstr: str):
+    nk = ("sbdb", sstr)
+    hit = _neg_cache.get(nk, _MISS)
+    if hit is not _MISS:
+        return hit
+    js = await _lookup_get(SBDB_BASE, params={"sstr": sstr, "phys-par": "1"}, sem=_sbdb_sem)
+    phys = js.get("phys_par", {}) if isinstance(js, dict) else None
+    if not phys:
+        _neg_cache[nk] = phys
+    return phys
 
 TAXO_RHO = {
     "C": 1.3, "B": 1.3, "G": 1.3, "F": 1.3,
@@ -641,10 +954,14 @@ TAXO_RHO = {
 def estimate_mass_from_diameter_density(d_km: Optional[float], rho_g_cm3: Optional[float]):
     if not d_km or not rho_g_cm3:
         return None
+    return _mass_from_diameter_kg_m3(d_km, rho_g_cm3 * 1000.0)  # g/cm^3 -> kg/m^3
+
+def _mass_from_diameter_kg_m3(d_km: Optional[float], rho_kg_m3: Optional[float]):
+    if not d_km or not rho_kg_m3:
+        return None
     r_m = (d_km * 1000.0) / 2.0
-    rho = rho_g_cm3 * 1000.0  # g/cm^3 -> kg/m^3
-    vol = (4.0/3.0) * math.pi * (r_m ** 3)
-    return rho * vol  # kg
+    # mesma ordem de avaliação da fórmula original: ρ · ((4/3)·π·r³)
+    return rho_kg_m3 * (_FOUR_THIRDS_PI * (r_m ** 3))  # kg
 
 def extract_taxonomy(card: dict):
     if not card: return None
@@ -735,21 +1052,40 @@ def _label_variants(label: str, fallback: dict = None):
 
     return out
 
-def enrich_by_label(label: str, neo_context: dict = None):
+async def enrich_by_label(label: str, neo_context: dict = None):
     ck = ("enrich", label)
-    cached = _enrich_cache_get(ck)
+    cached = _enrich_cache.get(ck)
     if cached is not None:
         return cached
+    raw = await _redis_get("enrich:" + label)
+    if raw:
+        cached = _enrich_cache[ck] = orjson.loads(raw)
+        return cached
 
     result = {"source": None, "mass_kg": None, "density_g_cm3": None,
               "diameter_km": None, "taxonomy": None, "bibcode": None, "note": None}
     notes = []
 
+    # SsODNet e SBDB são independentes: consulta os dois em paralelo e
+    # usa o SBDB só para completar o que o SsODNet não trouxer
+    async def _ssod_lookup():
+        sid = await ssod_quaero(label)
+        return await ssod_card(sid) if sid else None
+
+    # falha transitória num dos lados: segue com o que houver, mas não cacheia
+    failed = []
+    async def _guard(coro):
+        try:
+            return await coro
+        except _LookupFailed as e:
+            failed.append(e)
+            return None
+
+    card, phys = await asyncio.gather(_guard(_ssod_lookup()), _guard(sbdb_phys(label)))
+
     # 1) Tenta SsODNet
     try:
-        sid = ssod_quaero(label)
-        if sid:
-            card = ssod_card(sid)
+        if card:
             ssop = extract_phys_from_ssocard(card)
             if any([ssop.get("mass_kg"), ssop.get("density_g_cm3"), ssop.get("diameter_km")]):
                 result.update(ssop)
@@ -760,7 +1096,7 @@ def enrich_by_label(label: str, neo_context: dict = None):
     # 2) Tenta SBDB (fallback)
     try:
         if result["mass_kg"] is None or result["density_g_cm3"] is None or result["diameter_km"] is None:
-            sbp = extract_phys_from_sbdb(sbdb_phys(label))
+            sbp = extract_phys_from_sbdb(phys)
             for k, v in (sbp or {}).items():
                 if result.get(k) is None and v is not None:
                     result[k] = v
@@ -787,7 +1123,10 @@ def enrich_by_label(label: str, neo_context: dict = None):
 
     # 3c) Densidade: usa taxonomia -> TAXO_RHO; se não houver, usa DEFAULT_RHO_G_CM3
     if result["density_g_cm3"] is None:
-        taxo_key = str(result.get("taxonomy") or "").upper()
+        # só a chave do lookup é normalizada; o campo "taxonomy" sai como veio.
+        # O SsODNet manda str: dispensa o str()/"or" (e a cópia) no caso comum
+        tx = result.get("taxonomy")
+        taxo_key = tx.upper() if isinstance(tx, str) else str(tx or "").upper()
         rho = TAXO_RHO.get(taxo_key) if taxo_key else None
         if rho is not None:
             result["density_g_cm3"] = rho
@@ -811,14 +1150,33 @@ def enrich_by_label(label: str, neo_context: dict = None):
     if notes:
         result["note"] = "; ".join(notes)
 
-    # Cacheia mesmo se for estimado (evita recomputo)
-    _enrich_cache_set(ck, result)
+    # Cacheia mesmo se for estimado (evita recomputo), mas só se as fontes
+    # responderam de fato (200/404); senão a próxima chamada tenta de novo
+    if not failed:
+        _enrich_cache[ck] = result
+        await _redis_set("enrich:" + label, ENRICH_TTL, orjson.dumps(result))
     return result
 
+async def enrich_many(neos: List[dict]):
+    """
+    Enriquece vários NEOs em paralelo (um enrich_by_label por NEO) e grava
+    o resultado em neo["enrichment"]. Falha num NEO vira neo["enrichment_error"]
+    (como no /neo/{id}) sem derrubar o lote.
+    """
+    labels = [neo.get("name") or neo.get("designation") or str(neo.get("id")) for neo in neos]
+    results = await asyncio.gather(*[enrich_by_label(label) for label in labels],
+                                   return_exceptions=True)
+    for neo, enr in zip(neos, results):
+        if isinstance(enr, BaseException):
+            neo["enrichment_error"] = str(enr)
+        else:
+            neo["enrichment"] = enr
+
 
 
 
-app = FastAPI(title="NeoWS Python Proxy — Advanced", version="2.0.0", docs_url="/")
+app = FastAPI(title="NeoWS Python Proxy — Advanced", version="2.0.0", docs_url="/",
+              default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -828,28 +1186,148 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class _NDJSONPassthroughResponder(GZipResponder):
+    # NDJSON sai sem gzip: o GZipFile só libera bytes em blocos e seguraria o stream
+    passthrough = False
+
+    async def send_with_gzip(self, message):
+        if message["type"] == "http.response.start":
+            ctype = Headers(raw=message["headers"]).get("content-type", "")
+            self.passthrough = ctype.startswith("application/x-ndjson")
+        if self.passthrough:
+            await self.send(message)
+        else:
+            await super().send_with_gzip(message)
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware que não comprime respostas NDJSON (/neo/filter?stream=true)."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _NDJSONPassthroughResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+# JSON repetitivo (mesmas sugestões em todo NEO) comprime muito bem; respostas
+# pequenas (/health, erros) e o stream NDJSON passam direto
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
+@app.on_event("startup")
+async def _startup():
+    # cliente HTTP único (pool + HTTP/2) compartilhado por NeoWS, SsODNet e SBDB
+    app.state.http = httpx.AsyncClient(
+        timeout=30,
+        http2=True,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+    )
+    # pool de processos p/ avaliações em lote (spawn: não herda loop/sockets do pai)
+    app.state.assess_pool = (
+        ProcessPoolExecutor(max_workers=ASSESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        if ASSESS_WORKERS > 1 else None
+    )
+    if REDIS_URL:
+        import redis.asyncio as aioredis  # só exigido quando REDIS_URL está definido
+        app.state.redis = aioredis.Redis.from_url(REDIS_URL)
+    else:
+        app.state.redis = None
+
+@app.on_event("shutdown")
+async def _shutdown():
+    await app.state.http.aclose()
+    if app.state.assess_pool is not None:
+        app.state.assess_pool.shutdown(cancel_futures=True)
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
+
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
+def _feed_windows(start_date: str, end_date: Optional[str]) -> Optional[List[Tuple[str, str]]]:
+    """Janelas de até 7 dias (limite da NeoWS); None se não precisa dividir."""
+    if not end_date:
+        return None
+    try:
+        d0, d1 = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError:
+        return None  # a própria NeoWS devolve o erro de formato
+    if (d1 - d0).days <= 7:
+        return None
+    if (d1 - d0).days > FEED_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Intervalo máximo do feed: {FEED_MAX_DAYS} dias")
+    windows = []
+    while d0 <= d1:
+        w1 = min(d0 + timedelta(days=6), d1)
+        windows.append((d0.isoformat(), w1.isoformat()))
+        d0 = w1 + timedelta(days=1)
+    return windows
+
+async def _get_feed(start_date: str, end_date: Optional[str]) -> Tuple[dict, bool]:
+    """(feed, degradado?): degradado se alguma janela veio do stale por falha da NeoWS."""
+    windows = _feed_windows(start_date, end_date)
+    if windows is None:
+        params = {"api_key": NASA_KEY, "start_date": start_date}
+        if end_date: params["end_date"] = end_date
+        return await _get_state(f"{NASA_API}/feed", params)
+    # cada janela é buscada em paralelo e cacheada sozinha em _cache
+    states = await asyncio.gather(*[
+        _get_state(f"{NASA_API}/feed", {"api_key": NASA_KEY, "start_date": a, "end_date": b})
+        for a, b in windows
+    ])
+    parts = [part for part, _ in states]
+    neos_by_day: Dict[str, list] = {}
+    for part in parts:
+        neos_by_day.update(part.get("near_earth_objects", {}))
+    return {
+        "links": {"prev": parts[0].get("links", {}).get("prev"),
+                  "next": parts[-1].get("links", {}).get("next")},
+        "element_count": sum(part.get("element_count", 0) for part in parts),
+        "near_earth_objects": neos_by_day,
+    }, any(degraded for _, degraded in states)
+
+# feed com mitigations já avaliado e serializado; hit pula build_assessment e o dumps.
+# Só entra feed montado com dados frescos (stale de falha da NeoWS não é memoizado)
+_feed_cache = TTLCache(maxsize=512, ttl=CACHE_TTL)
+
 @app.get("/neo/feed")
-def neo_feed(
+async def neo_feed(
     start_date: str = Query(..., description="YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
     mitigations: bool = Query(False, description="Se true, inclui avaliação/mitigações por NEO")
 ):
-    params = {"api_key": NASA_KEY, "start_date": start_date}
-    if end_date: params["end_date"] = end_date
-    data = _get(f"{NASA_API}/feed", params)
+    if mitigations:
+        body = _feed_cache.get((start_date, end_date))
+        if body is not None:
+            return Response(content=body, media_type="application/json")
+    data, degraded = await _get_feed(start_date, end_date)
     if mitigations:
         neos_by_day = data.get("near_earth_objects", {})
-        for day, neos in neos_by_day.items():
+        # o mesmo NEO pode aparecer em mais de um dia: avalia uma vez por
+        # (id, aproximações) e compartilha a avaliação entre as cópias
+        unique: Dict[tuple, dict] = {}
+        dupes: List[tuple] = []
+        for neos in neos_by_day.values():
             for neo in neos:
-                neo["assessment"] = build_assessment(neo)
-    return data
+                key = (neo.get("id"), tuple(ap.get("close_approach_date_full")
+                                            for ap in neo.get("close_approach_data", []) if isinstance(ap, dict)))
+                if key in unique:
+                    dupes.append((neo, key))
+                else:
+                    unique[key] = neo
+        await assess_many(list(unique.values()))
+        for neo, key in dupes:
+            neo["assessment"] = unique[key]["assessment"]
+        body = orjson.dumps(data)
+        if not degraded:
+            _feed_cache[(start_date, end_date)] = body
+        return Response(content=body, media_type="application/json")
+    # payloads grandes: ORJSONResponse direto evita o jsonable_encoder do FastAPI
+    return ORJSONResponse(data)
 
 @app.get("/neo/{neo_id}")
-def neo_detail(
+async def neo_detail(
     neo_id: str,
     mitigations: bool = Query(True, description="Inclui avaliação por padrão"),
     enrich: bool = Query(False, description="Se true, junta massa/densidade"),
@@ -863,7 +1341,7 @@ def neo_detail(
     mass_kg: Optional[float] = Query(None, description="Sobrescreve massa (kg)")
 ):
     params = {"api_key": NASA_KEY}
-    neo = _get(f"{NASA_API}/neo/{neo_id}", params)
+    neo = await _get(f"{NASA_API}/neo/{neo_id}", params)
 
     if mitigations:
         neo["assessment"] = build_assessment(neo)
@@ -872,7 +1350,7 @@ def neo_detail(
     if enrich:
         try:
             label = neo.get("name") or neo.get("designation") or str(neo_id)
-            enr = enrich_by_label(label, neo_context=neo)
+            enr = await enrich_by_label(label, neo_context=neo)
             neo["enrichment"] = enr
         except Exception as e:
             neo["enrichment_error"] = str(e)
@@ -892,88 +1370,160 @@ def neo_detail(
         except Exception as e:
             neo["impact_error"] = str(e)
 
-    return neo
+    return ORJSONResponse(neo)
+
+async def _browse(page: int, size: int) -> dict:
+    # página crua do NeoWS browse (via _cache/single-flight), sem avaliar nada
+    return await _get(f"{NASA_API}/neo/browse", {"api_key": NASA_KEY, "page": page, "size": size})
 
 @app.get("/neo/browse")
-def neo_browse(page: int = 0, size: int = 20, mitigations: bool = Query(False), enrich: bool = Query(False)):
-    params = {"api_key": NASA_KEY, "page": page, "size": size}
-    data = _get(f"{NASA_API}/neo/browse", params)
-    if mitigations or enrich:
-        for neo in data.get("near_earth_objects", []):
-            if mitigations:
-                neo["assessment"] = build_assessment(neo)
-            if enrich:
-                label = neo.get("name") or neo.get("designation") or str(neo.get("id"))
-                neo["enrichment"] = enrich_by_label(label)
+async def neo_browse(page: int = 0, size: int = 20, mitigations: bool = Query(False), enrich: bool = Query(False)):
+    data = await _browse(page, size)
+    neos = data.get("near_earth_objects", [])
+    if mitigations:
+        await assess_many(neos)
+    if enrich:
+        await enrich_many(neos)
     return data
 
-def _any_approach_in_window(neo: dict, date_from: Optional[str], date_to: Optional[str], body: Optional[str]) -> bool:
-    if not date_from and not date_to and not body:
-        return True
-    df = _parse_iso(date_from).date() if date_from else None
-    dt = _parse_iso(date_to).date() if date_to else None
-    bnorm = body.lower() if body else None
-    for ap in neo.get("close_approach_data", []):
-        try:
-            dstr = ap.get("close_approach_date_full") or ap.get("close_approach_date")
-            d = _parse_iso(dstr).date() if dstr else None
-            orbiting = ap.get("orbiting_body", "")
-            if df and d and d < df: 
-                continue
-            if dt and d and d > dt: 
-                continue
-            if bnorm and orbiting.lower() != bnorm: 
-                continue
+def _approach_in_window(neo: dict, df: Optional[date], dt: Optional[date], bnorm: Optional[str]) -> bool:
+    # linhas (data, corpo) já parseadas na mesma varredura das métricas
+    _, rows, (lo, hi, undated, bodies) = _scan_approaches_cached(neo)
+    # poda pelos limites: decide sem varrer as linhas quando dá
+    if bnorm and bnorm not in bodies:
+        return False
+    if not bnorm and undated:
+        return True  # linha sem data passa pelos filtros de data
+    if not undated and lo is not None:
+        if (df and hi < df) or (dt and lo > dt):
+            return False
+        if not bnorm and (not df or lo >= df) and (not dt or hi <= dt):
             return True
-        except Exception:
+    for d, orbiting in rows:
+        if df and d and d < df:
+            continue
+        if dt and d and d > dt:
             continue
+        if bnorm and orbiting != bnorm:
+            continue
+        return True
     return False
 
-def _passes_filters(neo: dict,
-                    hazardous: Optional[bool],
-                    min_diameter_km: Optional[float],
-                    max_diameter_km: Optional[float],
-                    min_miss_km: Optional[float],
-                    max_miss_km: Optional[float],
-                    min_rel_vel_kms: Optional[float],
-                    max_rel_vel_kms: Optional[float],
-                    days_min: Optional[int],
-                    days_max: Optional[int],
-                    mag_h_min: Optional[float],
-                    mag_h_max: Optional[float],
-                    approach_body: Optional[str],
-                    date_from: Optional[str],
-                    date_to: Optional[str]) -> bool:
-    m = compute_metrics(neo)
-    if hazardous is not None and m["is_hazardous"] != hazardous:
-        return False
-    if min_diameter_km is not None and (m["diameter_km"] is None or m["diameter_km"] < min_diameter_km):
-        return False
-    if max_diameter_km is not None and (m["diameter_km"] is None or m["diameter_km"] > max_diameter_km):
-        return False
-    if min_miss_km is not None and (m["min_miss_km"] is None or m["min_miss_km"] < min_miss_km):
-        return False
-    if max_miss_km is not None and (m["min_miss_km"] is None or m["min_miss_km"] > max_miss_km):
-        return False
-    if min_rel_vel_kms is not None and m["max_rel_vel_kms"] < min_rel_vel_kms:
-        return False
-    if max_rel_vel_kms is not None and m["max_rel_vel_kms"] > max_rel_vel_kms:
-        return False
-    if days_min is not None and (m["days_to_soonest_approach"] is None or m["days_to_soonest_approach"] < days_min):
-        return False
-    if days_max is not None and (m["days_to_soonest_approach"] is None or m["days_to_soonest_approach"] > days_max):
-        return False
-    H = m["absolute_magnitude_h"]
-    if mag_h_min is not None and (H is None or H < mag_h_min):
-        return False
-    if mag_h_max is not None and (H is None or H > mag_h_max):
-        return False
-    if not _any_approach_in_window(neo, date_from, date_to, approach_body):
-        return False
-    return True
+def _make_filter(hazardous: Optional[bool],
+                 min_diameter_km: Optional[float],
+                 max_diameter_km: Optional[float],
+                 min_miss_km: Optional[float],
+                 max_miss_km: Optional[float],
+                 min_rel_vel_kms: Optional[float],
+                 max_rel_vel_kms: Optional[float],
+                 days_min: Optional[int],
+                 days_max: Optional[int],
+                 mag_h_min: Optional[float],
+                 mag_h_max: Optional[float],
+                 approach_body: Optional[str],
+                 date_from: Optional[str],
+                 date_to: Optional[str]) -> Callable[[dict], bool]:
+    """
+    Monta o predicado uma vez por requisição: só entram os testes dos parâmetros
+    informados, e a janela de datas/corpo é normalizada aqui, não por NEO.
+    """
+    # predicados baratos direto do dict bruto, antes de varrer close_approach_data
+    raw: List[Callable[[dict], bool]] = []
+    if hazardous is not None:
+        raw.append(lambda neo: bool(neo.get("is_potentially_hazardous_asteroid", False)) == hazardous)
+    if mag_h_min is not None or mag_h_max is not None:
+        def h_ok(neo: dict) -> bool:
+            H = neo.get("absolute_magnitude_h")
+            if H is None:
+                return False
+            return not ((mag_h_min is not None and H < mag_h_min) or (mag_h_max is not None and H > mag_h_max))
+        raw.append(h_ok)
+    if min_diameter_km is not None or max_diameter_km is not None:
+        def dia_ok(neo: dict) -> bool:
+            dia = _dia_km(neo)
+            if dia is None:
+                return False
+            return not ((min_diameter_km is not None and dia < min_diameter_km)
+                        or (max_diameter_km is not None and dia > max_diameter_km))
+        raw.append(dia_ok)
+
+    # testes sobre as métricas de aproximação (só calculadas se algum existir)
+    metric: List[Callable[[NeoMetrics], bool]] = []
+    if min_miss_km is not None or max_miss_km is not None:
+        def miss_ok(m: NeoMetrics) -> bool:
+            mm = m.min_miss_km
+            if mm is None:
+                return False
+            return not ((min_miss_km is not None and mm < min_miss_km) or (max_miss_km is not None and mm > max_miss_km))
+        metric.append(miss_ok)
+    if min_rel_vel_kms is not None:
+        metric.append(lambda m: not m.max_rel_vel_kms < min_rel_vel_kms)
+    if max_rel_vel_kms is not None:
+        metric.append(lambda m: not m.max_rel_vel_kms > max_rel_vel_kms)
+    if days_min is not None or days_max is not None:
+        def days_ok(m: NeoMetrics) -> bool:
+            d = m.days_to_soonest_approach
+            if d is None:
+                return False
+            return not ((days_min is not None and d < days_min) or (days_max is not None and d > days_max))
+        metric.append(days_ok)
+
+    window = bool(date_from or date_to or approach_body)
+    df = _parse_iso(date_from).date() if date_from else None
+    dt = _parse_iso(date_to).date() if date_to else None
+    bnorm = approach_body.lower() if approach_body else None
+
+    def accept(neo: dict) -> bool:
+        for ok in raw:
+            if not ok(neo):
+                return False
+        if metric:
+            m = compute_metrics_cached(neo)
+            for ok in metric:
+                if not ok(m):
+                    return False
+        return not window or _approach_in_window(neo, df, dt, bnorm)
+    return accept
+
+async def _filter_stream(page_tasks: List[asyncio.Future], accept, limit: int,
+                         mitigations: bool, enrich: bool):
+    """
+    Corpo NDJSON do /neo/filter?stream=true: consome as páginas na ordem,
+    avalia/enriquece só os aceitos daquela página e já envia as linhas.
+    """
+    seen_ids = set()
+    sent = 0
+    try:
+        for task in page_tasks:
+            data = await task
+            batch: List[dict] = []
+            for neo in data.get("near_earth_objects", []):
+                nid = neo.get("id")
+                if nid in seen_ids: continue
+                if accept(neo):
+                    batch.append(neo)
+                    seen_ids.add(nid)
+                    if sent + len(batch) >= limit:
+                        break
+            if mitigations:
+                await assess_many(batch)
+            if enrich:
+                await enrich_many(batch)
+            for neo in batch:
+                yield orjson.dumps(neo) + b"\n"
+            sent += len(batch)
+            if sent >= limit:
+                break
+    finally:
+        # páginas que não chegaram a ser consumidas (limit ou cliente desconectou)
+        for task in page_tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # marca o erro como lido (evita warning no log)
 
 @app.get("/neo/filter")
-def neo_filter(
+async def neo_filter(
     pages: int = Query(3, ge=1, le=50),
     size: int = Query(50, ge=1, le=100),
     limit: int = Query(200, ge=1, le=1000),
@@ -992,32 +1542,46 @@ def neo_filter(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     mitigations: bool = Query(True),
-    enrich: bool = Query(False)
+    enrich: bool = Query(False),
+    stream: bool = Query(False, description="Se true, responde NDJSON (um NEO por linha) conforme as páginas chegam")
 ):
+    accept = _make_filter(hazardous, min_diameter_km, max_diameter_km,
+                          min_miss_km, max_miss_km, min_rel_vel_kms, max_rel_vel_kms,
+                          days_min, days_max, mag_h_min, mag_h_max, approach_body,
+                          date_from, date_to)
+
+    # busca todas as páginas em paralelo e filtra na ordem original
+    page_tasks = [asyncio.ensure_future(_browse(page, size)) for page in range(pages)]
+    if stream:
+        # NDJSON não passa pelo gzip (StreamAwareGZipMiddleware): cada linha sai na hora
+        return StreamingResponse(_filter_stream(page_tasks, accept, limit, mitigations, enrich),
+                                 media_type="application/x-ndjson")
+
     results: List[dict] = []
     seen_ids = set()
-    for page in range(pages):
-        data = _get(f"{NASA_API}/neo/browse", {"api_key": NASA_KEY, "page": page, "size": size})
+    # erro numa página só derruba a requisição se o loop chegar nela antes do limit
+    pages_data = await asyncio.gather(*page_tasks, return_exceptions=True)
+    for data in pages_data:
+        if isinstance(data, BaseException):
+            raise data
         for neo in data.get("near_earth_objects", []):
             nid = neo.get("id")
             if nid in seen_ids: continue
-            if _passes_filters(neo, hazardous, min_diameter_km, max_diameter_km,
-                               min_miss_km, max_miss_km, min_rel_vel_kms, max_rel_vel_kms,
-                               days_min, days_max, mag_h_min, mag_h_max, approach_body,
-                               date_from, date_to):
-                if mitigations:
-                    neo["assessment"] = build_assessment(neo)
-                if enrich:
-                    label = neo.get("name") or neo.get("designation") or str(nid)
-                    neo["enrichment"] = enrich_by_label(label)
+            if accept(neo):
                 results.append(neo)
                 seen_ids.add(nid)
                 if len(results) >= limit:
-                    return {"count": len(results), "near_earth_objects": results}
-    return {"count": len(results), "near_earth_objects": results}
+                    break
+        if len(results) >= limit:
+            break
+    if mitigations:
+        await assess_many(results)
+    if enrich:
+        await enrich_many(results)
+    return ORJSONResponse({"count": len(results), "near_earth_objects": results})
 
 @app.get("/neo/hazardous")
-def neo_hazardous(
+async def neo_hazardous(
     page: int = 0,
     size: int = 50,
     min_diameter_km: float = 0.0,
@@ -1031,52 +1595,36 @@ def neo_hazardous(
     approach_body: Optional[str] = None,
     enrich: bool = Query(False)
 ):
-    raw = neo_browse(page=page, size=size, mitigations=False, enrich=False)
+    raw = await _browse(page, size)
+    # mesmo predicado do /neo/filter: flag PHA e diâmetro saem do dict
+    # bruto, só então as métricas (memoizadas) de aproximação
+    accept = _make_filter(True, min_diameter_km, max_diameter_km,
+                          min_miss_distance_km, max_miss_distance_km,
+                          min_rel_vel_kms, max_rel_vel_kms, None, days_max,
+                          None, None, approach_body, None, None)
     filtered = []
     for neo in raw.get("near_earth_objects", []):
         try:
-            metrics = compute_metrics(neo)
-            if not neo.get("is_potentially_hazardous_asteroid", False):
-                continue
-            if metrics["diameter_km"] is None or metrics["diameter_km"] < min_diameter_km:
-                continue
-            if max_diameter_km is not None and metrics["diameter_km"] > max_diameter_km:
-                continue
-            mm = metrics["min_miss_km"]
-            if mm is None: 
-                continue
-            if mm > max_miss_distance_km:
-                continue
-            if min_miss_distance_km is not None and mm < min_miss_distance_km:
-                continue
-            if min_rel_vel_kms is not None and metrics["max_rel_vel_kms"] < min_rel_vel_kms:
-                continue
-            if max_rel_vel_kms is not None and metrics["max_rel_vel_kms"] > max_rel_vel_kms:
-                continue
-            if days_max is not None and (metrics["days_to_soonest_approach"] is None or metrics["days_to_soonest_approach"] > days_max):
-                continue
-            if approach_body and not _any_approach_in_window(neo, None, None, approach_body):
-                continue
-            if mitigations:
-                neo["assessment"] = build_assessment(neo)
-            if enrich:
-                label = neo.get("name") or neo.get("designation") or str(neo.get("id"))
-                neo["enrichment"] = enrich_by_label(label)
-            filtered.append(neo)
+            if accept(neo):
+                filtered.append(neo)
         except Exception:
             continue
-    return {"count": len(filtered), "near_earth_objects": filtered}
+    if mitigations:
+        await assess_many(filtered)  # reaproveita as métricas já memoizadas no filtro
+    if enrich:
+        await enrich_many(filtered)
+    return ORJSONResponse({"count": len(filtered), "near_earth_objects": filtered})
 
 
 @app.get("/neo/enrich/{neo_id}")
-def neo_enrich(neo_id: str):
+async def neo_enrich(neo_id: str):
     try:
-        neo = _get(f"{NASA_API}/neo/{neo_id}", {"api_key": NASA_KEY})
+        neo = await _get(f"{NASA_API}/neo/{neo_id}", {"api_key": NASA_KEY})
         label = neo.get("name") or neo.get("designation") or str(neo_id)
-        data = enrich_by_label(label, neo_context=neo)  # << aqui
-        return {"neo_id": neo_id, "label": label, "enrichment": data}
+        data = await enrich_by_label(label, neo_context=neo)  # << aqui
+        return ORJSONResponse({"neo_id": neo_id, "label": label, "enrichment": data})
     except Exception as e:
-        return JSONResponse(status_code=502, content={
+        return ORJSONResponse(status_code=502, content={
             "error": "enrichment_failed",
             "detail": str(e)
         })
@@ -1120,7 +1668,7 @@ def neo_enrich(neo_id: str):
 #         return JSONResponse(status_code=502, content={"error": "impact_estimate_failed", "detail": str(e)})
 
 @app.get("/neo/impact/{neo_id}")
-def neo_impact(
+async def neo_impact(
     neo_id: str,
     velocity_kms: float | None = Query(None),
     angle_deg: float = Query(45.0, ge=1.0, le=90.0),
@@ -1137,12 +1685,12 @@ def neo_impact(
     seismic_coupling: float = Query(SEISMIC_COUPLING_DEFAULT, description="Fraç. de energia cinética → energia sísmica"),
 ):
     try:
-        neo = _get(f"{NASA_API}/neo/{neo_id}", {"api_key": NASA_KEY})
+        neo = await _get(f"{NASA_API}/neo/{neo_id}", {"api_key": NASA_KEY})
         label = neo.get("name") or neo.get("designation") or str(neo_id)
         enr = None
         if enrich:
             try:
-                enr = enrich_by_label(label, neo_context=neo)
+                enr = await enrich_by_label(label, neo_context=neo)
             except Exception as e:
                 enr = None
                 neo["enrichment_error"] = str(e)
@@ -1162,6 +1710,7 @@ def neo_impact(
             dispersion_length_km=dispersion_length_km,
             seismic_coupling=seismic_coupling
         )
-        return {"neo_id": neo_id, "label": label, "impact": out, "enrichment": enr if enrich else None}
+        # dict aninhado grande: ORJSONResponse direto pula o jsonable_encoder
+        return ORJSONResponse({"neo_id": neo_id, "label": label, "impact": out, "enrichment": enr if enrich else None})
     except Exception as e:
-        return JSONResponse(status_code=502, content={"error": "impact_estimate_failed", "detail": str(e)})
+        return ORJSONResponse(status_code=502, content={"error": "impact_estimate_failed", "detail": str(e)})
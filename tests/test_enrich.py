@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+
+import httpx
+
+import main
+
+
+class EnrichCacheTest(unittest.TestCase):
+    """Respostas definitivas (3xx/4xx) vão p/ cache; falhas transitórias (5xx) não."""
+
+    def setUp(self):
+        main._enrich_cache.clear()
+        main._neg_cache.clear()
+        main.app.state.redis = None
+
+    def _enrich_twice(self, status: int) -> list:
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(str(request.url))
+            return httpx.Response(status, json={"message": "upstream"})
+
+        async def run():
+            main.app.state.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                first = await main.enrich_by_label("bar")
+                n_first = len(calls)
+                second = await main.enrich_by_label("bar")
+            finally:
+                await main.app.state.http.aclose()
+            self.assertEqual(first["source"], "estimate")
+            self.assertEqual(first, second)
+            return [n_first, len(calls) - n_first]
+
+        return asyncio.run(run())
+
+    def test_final_answers_are_cached(self):
+        for status in (300, 400, 404):
+            with self.subTest(status=status):
+                self.setUp()
+                first, second = self._enrich_twice(status)
+                self.assertEqual(first, 2)  # quaero + sbdb
+                self.assertEqual(second, 0)
+
+    def test_transient_failures_are_not_cached(self):
+        retries, main.UPSTREAM_RETRIES = main.UPSTREAM_RETRIES, 0
+        try:
+            first, second = self._enrich_twice(503)
+        finally:
+            main.UPSTREAM_RETRIES = retries
+        self.assertEqual(first, 2)
+        self.assertEqual(second, 2)
+        self.assertNotIn(("enrich", "bar"), main._enrich_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
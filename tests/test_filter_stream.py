@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+import zlib
+
+import httpx
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+import main
+
+
+def _neo(i: int) -> dict:
+    return {"id": str(i), "name": f"({i}) Test{i}", "close_approach_data": []}
+
+
+def _app_gzip(inner):
+    # mesma classe/configuração de gzip registrada na app
+    m = next(m for m in main.app.user_middleware if issubclass(m.cls, GZipMiddleware))
+    return m.cls(inner, **m.kwargs)
+
+
+async def _serve(asgi, start: dict, on_body):
+    async def receive():
+        await asyncio.Event().wait()  # cliente nunca desconecta
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message.get("body"):
+            on_body(message["body"])
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"},
+             "http_version": "1.1", "method": "GET", "path": "/neo/filter",
+             "query_string": b"stream=true", "headers": [(b"accept-encoding", b"gzip")]}
+    await asgi(scope, receive, send)
+
+
+def _headers(start: dict) -> dict:
+    return {k.decode().lower(): v.decode() for k, v in start["headers"]}
+
+
+class FilterStreamGzipTest(unittest.TestCase):
+    """/neo/filter?stream=true não pode ser bufferizado pelo gzip da app."""
+
+    def test_first_line_before_last_page_with_gzip_accepted(self):
+        try:
+            # o timeout só limita o caso de falha (deadlock do portão), não mede latência
+            asyncio.run(asyncio.wait_for(self._run(), timeout=10))
+        except asyncio.TimeoutError:
+            self.fail("stream bufferizado: a 1ª linha não chegou antes da última página")
+
+    async def _run(self):
+        pages, size = 4, 5
+        # a última página só responde depois que o cliente recebeu a 1ª linha:
+        # se o stream for bufferizado até o fim, isso nunca acontece (timeout)
+        first_line = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            p = int(request.url.params["page"])
+            if p == pages - 1:
+                await first_line.wait()
+            return httpx.Response(200, json={"near_earth_objects": [_neo(p * 100 + k) for k in range(size)]})
+
+        main._cache.clear()
+        main._stale_cache.clear()
+        main._degraded_cache.clear()
+        main.app.state.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        main.app.state.redis = None
+        chunks: list = []
+        start: dict = {}
+        gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        def on_body(body: bytes):
+            # o que o cliente consegue ler até aqui (descomprime se vier gzip)
+            if _headers(start).get("content-encoding") == "gzip":
+                body = gunzip.decompress(body)
+            chunks.append(body)
+            if b"\n" in body:
+                first_line.set()
+
+        try:
+            response = await main.neo_filter(
+                pages=pages, size=size, limit=1000, hazardous=None,
+                min_diameter_km=None, max_diameter_km=None, min_miss_km=None, max_miss_km=None,
+                min_rel_vel_kms=None, max_rel_vel_kms=None, days_min=None, days_max=None,
+                mag_h_min=None, mag_h_max=None, approach_body=None, date_from=None, date_to=None,
+                mitigations=False, enrich=False, stream=True)
+            await _serve(_app_gzip(response), start, on_body)
+        finally:
+            await main.app.state.http.aclose()
+
+        self.assertNotIn("content-encoding", _headers(start))
+        lines = b"".join(chunks).splitlines()
+        self.assertEqual(len(lines), pages * size)
+
+    def test_plain_json_is_still_gzipped(self):
+        async def run():
+            start: dict = {}
+            response = ORJSONResponse({"near_earth_objects": [_neo(i) for i in range(200)]})
+            await _serve(_app_gzip(response), start, lambda body: None)
+            return _headers(start)
+
+        self.assertEqual(asyncio.run(run()).get("content-encoding"), "gzip")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import unittest
+
+import httpx
+
+import main
+
+URL = f"{main.NASA_API}/neo/browse"
+PARAMS = {"api_key": "k", "page": 0, "size": 1}
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.sets = []
+
+    async def get(self, key):
+        return None
+
+    async def setex(self, key, ttl, raw):
+        self.sets.append((key, ttl))
+
+
+class StaleFallbackTest(unittest.TestCase):
+    """Revalidação (304) e stale em 429/5xx: o stale nunca vira entrada "fresca"."""
+
+    def test_stale_is_served_degraded_and_not_promoted(self):
+        asyncio.run(self._run())
+
+    async def _run(self):
+        upstream = {"status": 200}
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.headers.get("If-None-Match"))
+            if upstream["status"] == 200:
+                return httpx.Response(200, json={"v": 1}, headers={"ETag": '"e1"'})
+            return httpx.Response(upstream["status"])
+
+        for c in (main._cache, main._stale_cache, main._degraded_cache):
+            c.clear()
+        redis = main.app.state.redis = _FakeRedis()
+        main.app.state.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        retries, main.UPSTREAM_RETRIES = main.UPSTREAM_RETRIES, 0
+        try:
+            self.assertEqual(await main._get_state(URL, PARAMS), ({"v": 1}, False))
+            self.assertEqual(len(redis.sets), 1)
+
+            # L1 expirou e a NeoWS caiu: serve a última versão boa, marcada como degradada
+            main._cache.clear()
+            upstream["status"] = 503
+            self.assertEqual(await main._get_state(URL, PARAMS), ({"v": 1}, True))
+            self.assertEqual(seen[-1], '"e1"')
+            self.assertEqual(len(main._cache), 0)
+            self.assertEqual(len(redis.sets), 1)
+
+            # enquanto vale o _degraded_cache, não martela a NeoWS
+            calls = len(seen)
+            self.assertEqual(await main._get_state(URL, PARAMS), ({"v": 1}, True))
+            self.assertEqual(len(seen), calls)
+
+            # passado o _DEGRADED_TTL, revalida; 304 volta a ser fresco (L1 + Redis)
+            main._degraded_cache.clear()
+            upstream["status"] = 304
+            self.assertEqual(await main._get_state(URL, PARAMS), ({"v": 1}, False))
+            self.assertEqual(len(main._cache), 1)
+            self.assertEqual(len(redis.sets), 2)
+        finally:
+            main.UPSTREAM_RETRIES = retries
+            await main.app.state.http.aclose()
+            main.app.state.redis = None
+
+
+class FeedDegradedTest(unittest.TestCase):
+    """Feed montado sobre stale (falha da NeoWS) não entra no _feed_cache."""
+
+    def test_degraded_feed_is_not_memoised(self):
+        asyncio.run(self._run())
+
+    async def _run(self):
+        upstream = {"status": 200, "name": "fresh"}
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(str(request.url))
+            if upstream["status"] != 200:
+                return httpx.Response(upstream["status"])
+            neo = {"id": "1", "name": upstream["name"], "close_approach_data": []}
+            return httpx.Response(200, json={"element_count": 1, "near_earth_objects": {"2025-01-01": [neo]}},
+                                  headers={"ETag": '"f1"'})
+
+        async def feed() -> str:
+            r = await main.neo_feed(start_date="2025-01-01", end_date=None, mitigations=True)
+            return main.orjson.loads(r.body)["near_earth_objects"]["2025-01-01"][0]["name"]
+
+        for c in (main._cache, main._stale_cache, main._degraded_cache, main._feed_cache):
+            c.clear()
+        main.app.state.redis = None
+        main.app.state.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        retries, main.UPSTREAM_RETRIES = main.UPSTREAM_RETRIES, 0
+        try:
+            self.assertEqual(await feed(), "fresh")
+            self.assertEqual(len(main._feed_cache), 1)
+
+            # CACHE_TTL venceu e a NeoWS caiu: responde com o stale, sem memoizar
+            main._cache.clear()
+            main._feed_cache.clear()
+            upstream.update(status=503, name="new")
+            self.assertEqual(await feed(), "fresh")
+            self.assertEqual(len(main._feed_cache), 0)
+
+            # NeoWS voltou e o _DEGRADED_TTL passou: o feed busca de novo
+            main._degraded_cache.clear()
+            upstream["status"] = 200
+            before = len(calls)
+            self.assertEqual(await feed(), "new")
+            self.assertEqual(len(calls), before + 1)
+        finally:
+            main.UPSTREAM_RETRIES = retries
+            await main.app.state.http.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()